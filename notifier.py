@@ -1,6 +1,6 @@
 """
 Reusable notification module — email via Resend API.
-Extensible: subclass Notifier to add Slack, SMS, webhooks etc.
+Extensible: implement the Notifier protocol to add Slack, SMS, webhooks etc.
 
 Note on Resend free tier: emails can only be sent to the address you
 signed up with unless you verify a custom domain at resend.com/domains.
@@ -9,19 +9,59 @@ DEPRECATED
 """
 
 import os
+import re
+import json
+import time
+import random
+import uuid
+import asyncio
 import logging
-import requests
-from abc import ABC, abstractmethod
+import functools
+import httpx
+import jinja2
 from dataclasses import dataclass
+from typing import Protocol
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode()
 
 logger = logging.getLogger(__name__)
 
 RESEND_API_URL = "https://api.resend.com/emails"
 
+# Transient failures worth retrying (rate limit + upstream 5xx). Sends are not
+# idempotent, so every attempt at one body carries the same Idempotency-Key —
+# Resend then delivers a retried email at most once
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRIES    = 4
+BACKOFF_BASE_S = 1.0
+BACKOFF_CAP_S  = 30.0
+
+# /emails/batch takes up to 100 separate messages per request
+RESEND_BATCH_URL  = "https://api.resend.com/emails/batch"
+RESEND_BATCH_SIZE = 100
+
+# Resend replies with a tiny {"id": "..."} document — the id is near the start
+_ID_RE = re.compile(rb'"id"\s*:\s*"([^"]+)"')
+
+# Shared HTTP/2 client — consecutive sends multiplex over one TLS connection to
+# Resend, and HPACK compresses the repeated Authorization header
+_CLIENT = httpx.Client(http2=True, timeout=10.0, limits=httpx.Limits(max_keepalive_connections=4))
+
+# Failures raised before Resend answered, worth retrying like a 5xx
+_TRANSIENT_ERRORS = (httpx.NetworkError, httpx.TimeoutException, httpx.RemoteProtocolError)
+
 
 # ─── Data Contract ────────────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AlertPayload:
     subject: str
     html_body: str
@@ -32,77 +72,292 @@ class AlertPayload:
 
 # ─── Base Interface ───────────────────────────────────────────────────────────
 
-class Notifier(ABC):
-    @abstractmethod
+class Notifier(Protocol):
     def send(self, payload: AlertPayload) -> bool:
         """Send alert. Returns True on success. Must never raise."""
 
 
 # ─── Resend Email Notifier ────────────────────────────────────────────────────
 
-class ResendEmailNotifier(Notifier):
+class ResendEmailNotifier:
     def __init__(self, api_key: str | None = None, sender: str | None = None):
         self.api_key = api_key or os.environ["RESEND_API_KEY"]
         self.sender  = sender or os.environ.get(
             "RESEND_SENDER", "Ticket Alert <onboarding@resend.dev>"
         )
+        # Built once — identical for every send from this notifier
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        self._from   = self.sender
+        self._client = _CLIENT
+
+    def _body(self, payload: AlertPayload, to: tuple[str, ...] | None = None) -> dict:
+        return {
+            "from": self._from,
+            "to": to or (payload.recipient,),
+            "subject": payload.subject,
+            "html": payload.html_body,
+            "text": payload.plain_body,
+        }
 
     def send(self, payload: AlertPayload) -> bool:
-        try:
-            response = requests.post(
-                RESEND_API_URL,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "from": self.sender,
-                    "to": [payload.recipient],
-                    "subject": payload.subject,
-                    "html": payload.html_body,
-                    "text": payload.plain_body,
-                },
-                timeout=10,
+        return self._post(self._body(payload), payload.recipient)
+
+    def send_batch(self, payload: AlertPayload, recipients: list[str]) -> dict[str, bool]:
+        """
+        Send one alert to many recipients through Resend's batch endpoint,
+        packing up to RESEND_BATCH_SIZE single-recipient messages into each
+        request so no one sees anyone else's address. Returns a success flag
+        per recipient. Must never raise.
+        """
+        results: dict[str, bool] = {}
+        for i in range(0, len(recipients), RESEND_BATCH_SIZE):
+            chunk = recipients[i:i + RESEND_BATCH_SIZE]
+            body  = [self._body(payload, to=(recipient,)) for recipient in chunk]
+            ok    = self._post(body, f"{len(chunk)} recipient(s)", RESEND_BATCH_URL)
+            results.update(dict.fromkeys(chunk, ok))
+        return results
+
+    def _post(self, body: dict | list[dict], label: str, url: str = RESEND_API_URL) -> bool:
+        content = _json_dumps(body)   # serialised once, reused across retries
+        headers = {**self._headers, "Idempotency-Key": uuid.uuid4().hex}
+        for attempt in range(MAX_RETRIES):
+            try:
+                response, error = self._client.post(url, headers=headers, content=content), None
+            except Exception as e:
+                response, error = None, e
+            outcome = _retry_outcome(attempt, label, response, error)
+            if isinstance(outcome, bool):
+                return outcome
+            time.sleep(outcome)
+        return False
+
+    async def send_many(self, payloads: list[AlertPayload]) -> list[bool]:
+        """
+        Send several alerts concurrently so wall-clock time is roughly one
+        round trip rather than one per payload. Returns a success flag per
+        payload, in order. Must never raise.
+        """
+        limits = httpx.Limits(max_connections=8, keepalive_expiry=60)
+        async with httpx.AsyncClient(
+            http2=True, headers=self._headers, timeout=10.0, limits=limits
+        ) as client:
+            results = await asyncio.gather(
+                *[self._post_one(client, p) for p in payloads],
+                return_exceptions=True,
             )
-            response.raise_for_status()
-            email_id = response.json().get("id", "unknown")
-            logger.info(f"Email sent via Resend (id={email_id}) to {payload.recipient}")
-            return True
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Resend API error {e.response.status_code}: {e.response.text}")
-            return False
-        except Exception as e:
-            logger.error(f"Resend send failed: {e}")
-            return False
-
-
-# ─── HTML helpers ─────────────────────────────────────────────────────────────
-
-def _price_cell(best: float | None, url: str, portal_label: str, is_cheaper: bool, is_only: bool) -> str:
-    """Render one portal price cell for the comparison table."""
-    if best is None:
-        return f"""
+        return [r is True for r in results]
+
+    async def _post_one(self, client: httpx.AsyncClient, payload: AlertPayload) -> bool:
+        content = _json_dumps(self._body(payload))
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        for attempt in range(MAX_RETRIES):
+            try:
+                response, error = await client.post(RESEND_API_URL, headers=headers, content=content), None
+            except Exception as e:
+                response, error = None, e
+            outcome = _retry_outcome(attempt, payload.recipient, response, error)
+            if isinstance(outcome, bool):
+                return outcome
+            await asyncio.sleep(outcome)
+        return False
+
+
+def _retry_outcome(
+    attempt: int, label: str, response: httpx.Response | None, error: Exception | None,
+) -> bool | float:
+    """
+    The retry policy shared by the sync and async send loops. Given what one
+    attempt produced — a response, or the exception raised instead — log it
+    and return True (sent), False (give up) or a delay in seconds to sleep
+    before the next attempt.
+    """
+    last = attempt == MAX_RETRIES - 1
+    if error is not None:
+        if isinstance(error, _TRANSIENT_ERRORS) and not last:
+            delay = _backoff_delay(attempt)
+            logger.warning("Resend send failed (%s) — retrying in %.1fs", error, delay)
+            return delay
+        logger.error("Resend send failed: %s", error)
+        return False
+    if response.status_code in RETRY_STATUSES and not last:
+        delay = _backoff_delay(attempt, response.headers.get("Retry-After"))
+        logger.warning("Resend API error %s — retrying in %.1fs", response.status_code, delay)
+        return delay
+    if not response.is_success:
+        logger.error("Resend API error %s: %s", response.status_code, response.text)
+        return False
+    logger.info("Email sent via Resend (id=%s) to %s", _email_id(response.content), label)
+    return True
+
+
+def _email_id(content: bytes) -> str:
+    """Pull the email id from a Resend response, only fully parsing it if the regex misses."""
+    match = _ID_RE.search(content, 0, 256)
+    try:
+        if match:
+            return match.group(1).decode()
+        parsed = _json_loads(content)
+    except ValueError:  # also covers UnicodeDecodeError from non-UTF-8 bytes
+        return "unknown"
+    # A 2xx body is not guaranteed to be an object — logging must never raise
+    return parsed.get("id", "unknown") if isinstance(parsed, dict) else "unknown"
+
+
+def _backoff_delay(attempt: int, retry_after: str | None = None) -> float:
+    """
+    Exponential backoff with full jitter, so many cron-driven senders hitting
+    a rate limit at once don't retry in lockstep. A numeric Retry-After
+    header from Resend takes precedence.
+    """
+    if retry_after:
+        try:
+            return min(BACKOFF_CAP_S, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+
+
+# ─── Templates ────────────────────────────────────────────────────────────────
+# Compiled once per process by _jinja_env(); build_ticket_alert_payload only renders.
+
+# Price span styles, indexed only / cheaper / neither
+_CELL_STYLES = (
+    "color:#2980b9;font-weight:bold",    # blue — only one available, no comparison
+    "color:#27ae60;font-weight:bold",    # green — cheaper of the two
+    "color:#555;font-weight:normal",
+)
+
+ALERT_TMPL = """
+{%- macro price_cell(best, url, portal_label, is_cheaper, is_only) -%}
+{% if best is none %}
         <td style="padding:14px 10px;vertical-align:top;color:#aaa;font-style:italic">
             Not available<br>
-            <a href="{url}" style="font-size:11px;color:#2980b9">{portal_label} →</a>
-        </td>"""
-
-    if is_only:
-        colour = "#2980b9"   # blue — only one available, no comparison
-        weight = "bold"
-    elif is_cheaper:
-        colour = "#27ae60"   # green — cheaper of the two
-        weight = "bold"
-    else:
-        colour = "#555"
-        weight = "normal"
-
-    return f"""
+            <a href="{{ url }}" style="font-size:11px;color:#2980b9">{{ portal_label }} →</a>
+        </td>
+{%- else %}
     <td style="padding:14px 10px;vertical-align:top">
-        <span style="color:{colour};font-weight:{weight}">€{best:.0f}</span><br>
-        <a href="{url}" style="font-size:11px;color:#2980b9">{portal_label} →</a>
-    </td>"""
+        <span style="{{ CELL_STYLES[0 if is_only else 1 if is_cheaper else 2] }}">€{{ "%.0f"|format(best) }}</span><br>
+        <a href="{{ url }}" style="font-size:11px;color:#2980b9">{{ portal_label }} →</a>
+    </td>
+{%- endif %}
+{%- endmacro %}
+
+    <html><body style="font-family:Arial,sans-serif;max-width:800px;margin:auto;color:#2c3e50">
+      <h2 style="color:#2c3e50">🎟️ CL Hospitality Ticket Alert</h2>
+{% if game_alerts %}
+        <h3 style="color:#2c3e50;margin-top:0">🟢 Games with tickets in range</h3>
+        <p style="color:#555;margin-top:-8px">
+            Showing cheapest available price per portal within €{{ threshold_low }}–€{{ threshold_high }}.
+            Green = cheaper of the two · Blue = only portal available · Grey = not available.
+        </p>
+        <table width="100%" cellspacing="0" style="border-collapse:collapse;margin-bottom:32px">
+          <thead>
+            <tr style="background:#2c3e50;color:#fff;text-align:left">
+              <th style="padding:12px 10px">Game</th>
+              <th style="padding:12px 10px">P1 Travel</th>
+              <th style="padding:12px 10px">Champions Travel</th>
+              <th style="padding:12px 10px">Verdict</th>
+            </tr>
+          </thead>
+          <tbody>
+{% for g in game_alerts %}
+            <tr style="border-bottom:1px solid #eee">
+              <td style="padding:14px 10px;font-weight:bold;vertical-align:top">{{ g.game_name }}</td>
+              {{ price_cell(g.p1_best, g.p1travel_url, "P1 Travel", g.p1_is_cheaper, g.p1_only) }}
+              {{ price_cell(g.champs_best, g.champions_travel_url, "Champions Travel", g.champs_is_cheaper, g.champs_only) }}
+              <td style="padding:14px 10px;vertical-align:top;font-size:13px">{{ g.verdict }}</td>
+            </tr>
+{% endfor %}
+          </tbody>
+        </table>
+{% endif %}
+{% if failed_urls %}
+        <h3 style="color:#c0392b">🔴 URLs that could not be checked</h3>
+        <p style="color:#555;margin-top:-8px">These pages failed to load or returned no prices. Check the links manually or update the URL in the config.</p>
+        <table width="100%" cellspacing="0" style="border-collapse:collapse">
+          <thead>
+            <tr style="background:#c0392b;color:#fff;text-align:left">
+              <th style="padding:10px">Game</th>
+              <th style="padding:10px">Portal</th>
+              <th style="padding:10px">URL</th>
+              <th style="padding:10px">Reason</th>
+            </tr>
+          </thead>
+          <tbody>
+{% for f in failed_urls %}
+            <tr style="border-bottom:1px solid #fde">
+              <td style="padding:12px 10px;font-weight:bold">{{ f.game_name }}</td>
+              <td style="padding:12px 10px;color:#c0392b">{{ f.portal }}</td>
+              <td style="padding:12px 10px">
+                <a href="{{ f.url }}" style="color:#2980b9;font-size:12px">{{ f.url }}</a>
+              </td>
+              <td style="padding:12px 10px;color:#888;font-size:12px">{{ f.reason }}</td>
+            </tr>
+{% endfor %}
+          </tbody>
+        </table>
+{% endif %}
+      <p style="color:#aaa;font-size:11px;margin-top:32px">
+        Automated alert · max 10/day · 9 AM – 5 PM PST only.
+      </p>
+    </body></html>"""
 
+TXT_TMPL = """\
+CL HOSPITALITY TICKET ALERT
+{{ "=" * 50 }}
+
+{% if game_alerts %}
+GAMES WITH TICKETS IN RANGE (€{{ threshold_low }}–€{{ threshold_high }})
+{{ "-" * 50 }}
+{% for g in game_alerts %}
+Game:              {{ g.game_name }}
+P1 Travel:         {{ "€%.0f"|format(g.p1_best) if g.p1_best else "Not available" }}  →  {{ g.p1travel_url }}
+Champions Travel:  {{ "€%.0f"|format(g.champs_best) if g.champs_best else "Not available" }}  →  {{ g.champions_travel_url }}
+Verdict:           {{ g.verdict }}
+
+{% endfor %}
+{% endif %}
+{% if failed_urls %}
+FAILED URLS — CHECK MANUALLY
+{{ "-" * 50 }}
+{% for f in failed_urls %}
+Game:    {{ f.game_name }}
+Portal:  {{ f.portal }}
+URL:     {{ f.url }}
+Reason:  {{ f.reason }}
+
+{% endfor %}
+{% endif %}
+"""
+
+@functools.cache
+def _jinja_env() -> jinja2.Environment:
+    """
+    Built on first render, not at import, and reused for the rest of the
+    process. Bytecode goes to Jinja's default per-user cache directory
+    (created 0700 and owner-checked, since it is loaded with marshal); the
+    workflow does not keep that directory, so each cron run compiles once.
+    """
+    # autoescape only applies to the .html template — the plain-text body must stay raw
+    env = jinja2.Environment(
+        loader=jinja2.DictLoader({
+            "alert.html": ALERT_TMPL,
+            "alert.txt":  TXT_TMPL,
+        }),
+        autoescape=jinja2.select_autoescape(enabled_extensions=("html",), default_for_string=False),
+        auto_reload=False,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(),
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    env.globals["CELL_STYLES"] = _CELL_STYLES
+    return env
+
+
+# ─── Alert Builder ────────────────────────────────────────────────────────────
 
 def _verdict_cell(g: dict) -> str:
     comparison = g["comparison"]
@@ -114,7 +369,43 @@ def _verdict_cell(g: dict) -> str:
         return "⚠️ Only Champions Travel available"
 
 
-# ─── Alert Builder ────────────────────────────────────────────────────────────
+@dataclass(slots=True, frozen=True)
+class _Row:
+    """One game_alerts entry, projected once so templates read slots, not dict keys."""
+    game_name: str
+    p1travel_url: str
+    champions_travel_url: str
+    p1_best: float | None
+    champs_best: float | None
+    comparison: str
+    cheaper_portal: str | None
+    saving: float | None
+    p1_is_cheaper: bool
+    champs_is_cheaper: bool
+    p1_only: bool
+    champs_only: bool
+    verdict: str
+
+    @classmethod
+    def from_alert(cls, g: dict) -> "_Row":
+        comparison = g["comparison"]
+        both       = comparison == "both"
+        return cls(
+            game_name=g["game_name"],
+            p1travel_url=g["p1travel_url"],
+            champions_travel_url=g["champions_travel_url"],
+            p1_best=g["p1_best"],
+            champs_best=g["champs_best"],
+            comparison=comparison,
+            cheaper_portal=g["cheaper_portal"],
+            saving=g["saving"],
+            p1_is_cheaper=both and g["cheaper_portal"] == "P1 Travel",
+            champs_is_cheaper=both and g["cheaper_portal"] == "Champions Travel",
+            p1_only=comparison == "p1_only",
+            champs_only=comparison == "champs_only",
+            verdict=_verdict_cell(g),
+        )
+
 
 def build_ticket_alert_payload(
     recipient: str,
@@ -141,120 +432,17 @@ def build_ticket_alert_payload(
         parts.append(f"{len(failed_urls)} URL(s) failed")
     subject = "🎟️ Ticket Alert — " + " · ".join(parts)
 
-    # ── HTML: price table ─────────────────────────────────────────────────────
-    alerts_html = ""
-    if has_alerts:
-        rows_html = ""
-        for g in game_alerts:
-            p1_best     = g["p1_best"]
-            champs_best = g["champs_best"]
-            comparison  = g["comparison"]
-
-            p1_is_cheaper    = comparison == "both" and g["cheaper_portal"] == "P1 Travel"
-            champs_is_cheaper = comparison == "both" and g["cheaper_portal"] == "Champions Travel"
-            p1_only          = comparison == "p1_only"
-            champs_only      = comparison == "champs_only"
-
-            p1_cell    = _price_cell(p1_best,     g["p1travel_url"],         "P1 Travel",       p1_is_cheaper,    p1_only)
-            champs_cell = _price_cell(champs_best, g["champions_travel_url"], "Champions Travel", champs_is_cheaper, champs_only)
-            verdict     = _verdict_cell(g)
-
-            rows_html += f"""
-            <tr style="border-bottom:1px solid #eee">
-              <td style="padding:14px 10px;font-weight:bold;vertical-align:top">{g['game_name']}</td>
-              {p1_cell}
-              {champs_cell}
-              <td style="padding:14px 10px;vertical-align:top;font-size:13px">{verdict}</td>
-            </tr>"""
-
-        alerts_html = f"""
-        <h3 style="color:#2c3e50;margin-top:0">🟢 Games with tickets in range</h3>
-        <p style="color:#555;margin-top:-8px">
-            Showing cheapest available price per portal within €{threshold_low}–€{threshold_high}.
-            Green = cheaper of the two · Blue = only portal available · Grey = not available.
-        </p>
-        <table width="100%" cellspacing="0" style="border-collapse:collapse;margin-bottom:32px">
-          <thead>
-            <tr style="background:#2c3e50;color:#fff;text-align:left">
-              <th style="padding:12px 10px">Game</th>
-              <th style="padding:12px 10px">P1 Travel</th>
-              <th style="padding:12px 10px">Champions Travel</th>
-              <th style="padding:12px 10px">Verdict</th>
-            </tr>
-          </thead>
-          <tbody>{rows_html}</tbody>
-        </table>"""
-
-    # ── HTML: failed URLs ─────────────────────────────────────────────────────
-    failures_html = ""
-    if has_failures:
-        failure_rows = ""
-        for f in failed_urls:
-            failure_rows += f"""
-            <tr style="border-bottom:1px solid #fde">
-              <td style="padding:12px 10px;font-weight:bold">{f['game_name']}</td>
-              <td style="padding:12px 10px;color:#c0392b">{f['portal']}</td>
-              <td style="padding:12px 10px">
-                <a href="{f['url']}" style="color:#2980b9;font-size:12px">{f['url']}</a>
-              </td>
-              <td style="padding:12px 10px;color:#888;font-size:12px">{f['reason']}</td>
-            </tr>"""
-
-        failures_html = f"""
-        <h3 style="color:#c0392b">🔴 URLs that could not be checked</h3>
-        <p style="color:#555;margin-top:-8px">These pages failed to load or returned no prices. Check the links manually or update the URL in the config.</p>
-        <table width="100%" cellspacing="0" style="border-collapse:collapse">
-          <thead>
-            <tr style="background:#c0392b;color:#fff;text-align:left">
-              <th style="padding:10px">Game</th>
-              <th style="padding:10px">Portal</th>
-              <th style="padding:10px">URL</th>
-              <th style="padding:10px">Reason</th>
-            </tr>
-          </thead>
-          <tbody>{failure_rows}</tbody>
-        </table>"""
-
-    html_body = f"""
-    <html><body style="font-family:Arial,sans-serif;max-width:800px;margin:auto;color:#2c3e50">
-      <h2 style="color:#2c3e50">🎟️ CL Hospitality Ticket Alert</h2>
-      {alerts_html}
-      {failures_html}
-      <p style="color:#aaa;font-size:11px;margin-top:32px">
-        Automated alert · max 10/day · 9 AM – 5 PM PST only.
-      </p>
-    </body></html>"""
-
-    # ── Plain text ────────────────────────────────────────────────────────────
-    lines = ["CL HOSPITALITY TICKET ALERT", "=" * 50, ""]
-
-    if has_alerts:
-        lines.append(f"GAMES WITH TICKETS IN RANGE (€{threshold_low}–€{threshold_high})")
-        lines.append("-" * 50)
-        for g in game_alerts:
-            p1_str    = f"€{g['p1_best']:.0f}"    if g["p1_best"]    else "Not available"
-            champs_str = f"€{g['champs_best']:.0f}" if g["champs_best"] else "Not available"
-            lines += [
-                f"Game:              {g['game_name']}",
-                f"P1 Travel:         {p1_str}  →  {g['p1travel_url']}",
-                f"Champions Travel:  {champs_str}  →  {g['champions_travel_url']}",
-                f"Verdict:           {_verdict_cell(g)}",
-                "",
-            ]
-
-    if has_failures:
-        lines.append("FAILED URLS — CHECK MANUALLY")
-        lines.append("-" * 50)
-        for f in failed_urls:
-            lines += [
-                f"Game:    {f['game_name']}",
-                f"Portal:  {f['portal']}",
-                f"URL:     {f['url']}",
-                f"Reason:  {f['reason']}",
-                "",
-            ]
-
-    plain_body = "\n".join(lines)
+    # Highlight flags and verdict computed once per game, shared by both templates
+    rows = [_Row.from_alert(g) for g in game_alerts]
+    context = {
+        "game_alerts":    rows,
+        "failed_urls":    failed_urls,
+        "threshold_low":  threshold_low,
+        "threshold_high": threshold_high,
+    }
+
+    html_body  = _jinja_env().get_template("alert.html").render(context)
+    plain_body = _jinja_env().get_template("alert.txt").render(context)
 
     return AlertPayload(
         subject=subject,
@@ -4,15 +4,25 @@ GitHub Actions commits the updated file back to the repo,
 which GitHub Pages then serves to the PWA.
 """
 
+import os
 import json
+import asyncio
 import logging
 import sys
+from bisect import bisect_left
 from datetime import datetime, timezone
 from pathlib import Path
-from zoneinfo import ZoneInfo
-import concurrent.futures
 
-from scraper import fetch_ticket_prices, TicketResult
+from scraper import CHROME_PROFILE_DIR, fetch_ticket_prices_batch_async, TicketResult
+
+try:
+    import orjson
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return (json.dumps(obj, indent=2, ensure_ascii=False) + "\n").encode()
 
 logging.basicConfig(
     level=logging.INFO,
@@ -45,27 +55,57 @@ THRESHOLD_LOW   = 100
 THRESHOLD_HIGH  = 600
 OUTPUT_FILE     = Path("docs/data/prices.json")
 
+# Wall-clock cap on the whole scrape phase (job timeout is 10 min); anything
+# still loading when it runs out is reported as a failed URL
+SCRAPE_BUDGET_S = 300
 
-# ─── Helpers ──────────────────────────────────────────────────────────────────
+# Max concurrent page loads against any one portal host — polite under rate limits
+PER_HOST_LIMIT  = 3
+
+PORTAL_URL_KEYS = (("P1 Travel", "p1travel_url"), ("Champions Travel", "champions_travel_url"))
+
+# Every (game, portal, url) to scrape — GAMES is static, so build it once at import
+SCRAPE_TASKS: tuple[tuple[str, str, str], ...] = tuple(
+    (game["name"], portal, game[key])
+    for portal, key in PORTAL_URL_KEYS
+    for game in GAMES
+)
 
-def cheapest_in_range(result: TicketResult | None) -> float | None:
-    if not result or result.error or not result.prices:
-        return None
-    in_range = [p for p in result.prices if THRESHOLD_LOW <= p <= THRESHOLD_HIGH]
-    return min(in_range) if in_range else None
 
+# ─── Helpers ──────────────────────────────────────────────────────────────────
 
 def portal_status(result: TicketResult | None, url: str) -> dict:
     if result is None:
         return {"ok": False, "reason": "No result returned", "url": url}
     if result.error:
         return {"ok": False, "reason": result.error, "url": url}
-    if not result.prices:
+    prices = result.prices
+    if not prices:
         return {"ok": False, "reason": "Page loaded but no prices found", "url": url}
-    best = cheapest_in_range(result)
-    if best is None:
+    # prices arrive sorted ascending, so the first one >= LOW is the cheapest candidate
+    i = bisect_left(prices, THRESHOLD_LOW)
+    if i == len(prices) or prices[i] > THRESHOLD_HIGH:
         return {"ok": False, "reason": f"Prices found but none in €{THRESHOLD_LOW}–€{THRESHOLD_HIGH}", "url": url}
-    return {"ok": True, "best": best, "url": url}
+    return {"ok": True, "best": prices[i], "url": url}
+
+
+async def scrape_all(scrape_tasks: tuple[tuple[str, str, str], ...] = SCRAPE_TASKS) -> dict[str, dict[str, TicketResult]]:
+    """
+    Scrape every (game, portal, url) task concurrently on a single event loop,
+    all through one PlaywrightSession so each host's connection is reused.
+    """
+    results = await fetch_ticket_prices_batch_async(
+        [(f"{name} ({portal})", url) for name, portal, url in scrape_tasks],
+        max_concurrency=None,
+        per_host_limit=PER_HOST_LIMIT,
+        budget_s=SCRAPE_BUDGET_S,
+        profile_dir=CHROME_PROFILE_DIR,
+    )
+
+    raw: dict[str, dict[str, TicketResult]] = {g["name"]: {} for g in GAMES}
+    for (name, portal, _), result in zip(scrape_tasks, results):
+        raw[name][portal] = result
+    return raw
 
 
 # ─── Main ─────────────────────────────────────────────────────────────────────
@@ -74,56 +114,43 @@ def main() -> None:
     logger.info("=== CL Hospitality Ticket Alert — scraping prices ===")
 
     # Scrape all URLs in parallel
-    scrape_tasks = [
-        (game["name"], "P1 Travel",        game["p1travel_url"])
-        for game in GAMES
-    ] + [
-        (game["name"], "Champions Travel",  game["champions_travel_url"])
-        for game in GAMES
-    ]
-
-    raw: dict[str, dict[str, TicketResult]] = {g["name"]: {} for g in GAMES}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=len(scrape_tasks)) as pool:
-        futures = {
-            pool.submit(fetch_ticket_prices, f"{name} ({portal})", url): (name, portal)
-            for name, portal, url in scrape_tasks
-        }
-        for future in concurrent.futures.as_completed(futures):
-            name, portal = futures[future]
-            raw[name][portal] = future.result()
+    raw = asyncio.run(scrape_all())
 
     # Build output
     games_out  = []
     failed_out = []
 
     for game in GAMES:
-        name   = game["name"]
-        p1_s   = portal_status(raw[name].get("P1 Travel"),       game["p1travel_url"])
-        ch_s   = portal_status(raw[name].get("Champions Travel"), game["champions_travel_url"])
-
-        p1_ok = p1_s["ok"]
-        ch_ok = ch_s["ok"]
+        name       = game["name"]
+        p1_url     = game["p1travel_url"]
+        ch_url     = game["champions_travel_url"]
+        p1_s       = portal_status(raw[name].get("P1 Travel"),        p1_url)
+        ch_s       = portal_status(raw[name].get("Champions Travel"), ch_url)
+        p1_ok      = p1_s["ok"]
+        ch_ok      = ch_s["ok"]
+        p1_best    = p1_s.get("best")
+        ch_best    = ch_s.get("best")
+        p1_reason  = p1_s.get("reason")
+        ch_reason  = ch_s.get("reason")
 
         logger.info(
-            f"[{name}] P1: {'€' + str(int(p1_s['best'])) if p1_ok else p1_s['reason']} | "
-            f"CT: {'€' + str(int(ch_s['best'])) if ch_ok else ch_s['reason']}"
+            "[%s] P1: %s | CT: %s",
+            name,
+            f"€{int(p1_best)}" if p1_ok else p1_reason,
+            f"€{int(ch_best)}" if ch_ok else ch_reason,
         )
 
         # Collect failures
-        for portal_name, status in [("P1 Travel", p1_s), ("Champions Travel", ch_s)]:
-            if not status["ok"]:
-                failed_out.append({
-                    "game_name": name,
-                    "portal":    portal_name,
-                    "url":       status["url"],
-                    "reason":    status["reason"],
-                })
+        if not p1_ok:
+            failed_out.append({"game_name": name, "portal": "P1 Travel",        "url": p1_url, "reason": p1_reason})
+        if not ch_ok:
+            failed_out.append({"game_name": name, "portal": "Champions Travel", "url": ch_url, "reason": ch_reason})
 
         # Determine comparison type
         if p1_ok and ch_ok:
             comparison     = "both"
-            cheaper_portal = "P1 Travel" if p1_s["best"] <= ch_s["best"] else "Champions Travel"
-            saving         = abs(p1_s["best"] - ch_s["best"])
+            cheaper_portal = "P1 Travel" if p1_best <= ch_best else "Champions Travel"
+            saving         = abs(p1_best - ch_best)
         elif p1_ok:
             comparison     = "p1_only"
             cheaper_portal = "P1 Travel"
@@ -139,10 +166,10 @@ def main() -> None:
 
         games_out.append({
             "game_name":            name,
-            "p1travel_url":         game["p1travel_url"],
-            "champions_travel_url": game["champions_travel_url"],
-            "p1_best":              p1_s.get("best"),
-            "champs_best":          ch_s.get("best"),
+            "p1travel_url":         p1_url,
+            "champions_travel_url": ch_url,
+            "p1_best":              p1_best,
+            "champs_best":          ch_best,
             "comparison":           comparison,
             "cheaper_portal":       cheaper_portal,
             "saving":               saving,
@@ -157,9 +184,13 @@ def main() -> None:
         "failed_urls":    failed_out,
     }
 
+    # Write-then-rename so a runner killed mid-write can't leave a truncated
+    # prices.json for the workflow to commit and the PWA to choke on
     OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_FILE.write_text(json.dumps(output, indent=2))
-    logger.info(f"Written → {OUTPUT_FILE}")
+    tmp = OUTPUT_FILE.with_suffix(".json.tmp")
+    tmp.write_bytes(_json_dumps(output))
+    os.replace(tmp, OUTPUT_FILE)
+    logger.info("Written → %s", OUTPUT_FILE)
 
 
 if __name__ == "__main__":
@@ -9,20 +9,66 @@ Legal compliance measures built in:
   - Data used for personal price monitoring only, not commercial exploitation
 """
 
+import os
 import re
+import asyncio
 import logging
-import urllib.robotparser
+import threading
+import urllib.error
 import urllib.parse
+import urllib.request
+import urllib.robotparser
+from contextlib import nullcontext
 from dataclasses import dataclass
 from functools import lru_cache
 from typing import Optional
 
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
+import httpx
+from playwright.async_api import async_playwright, Browser, BrowserContext, Error as PWError, Page, Playwright, Route, TimeoutError as PWTimeout
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 
 logger = logging.getLogger(__name__)
 
 PAGE_LOAD_TIMEOUT_MS = 30_000
 JS_SETTLE_WAIT_MS    = 3_000
+HTTP_TIMEOUT_S       = 10.0
+ROBOTS_TIMEOUT_S     = 5.0
+
+# Prices are read from rendered text only, so these never need to load.
+# document/xhr/fetch/script still go through so JS-rendered prices populate.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+# Only rendered text is read, so switch off everything else Chromium would spin up
+_CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-features=Translate,BackForwardCache,AcceptCHFrame,MediaRouter,OptimizationHints",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+]
+
+# Persistent profile so Chromium's HTTP cache (scripts, stylesheets, fonts,
+# API responses) and cookies survive between runs; the workflow restores it
+# with actions/cache from the same CL_CHROME_PROFILE_DIR. Per-user by default,
+# never a shared /tmp path — a --no-sandbox Chromium trusts what it loads from
+# here. Opt-in via PlaywrightSession(profile_dir=...): Chromium locks the
+# profile while it's open, so only one session at a time may use it.
+CHROME_PROFILE_DIR = os.path.expanduser(
+    os.environ.get("CL_CHROME_PROFILE_DIR", "~/.cache/cl-hospitality-ticket-alert/chrome-profile")
+)
+
+# page.route() disables Chromium's HTTP cache, so persistent-profile sessions
+# skip images with a Blink setting instead and let everything else hit the cache
+_PERSISTENT_PROFILE_ARGS = ["--blink-settings=imagesEnabled=false"]
+
+# Resolves as soon as anything price-shaped has rendered (mirrors _PRICE_RE)
+PRICE_RENDERED_JS = r"() => /(?:€|EUR)\s*\d|\d\s*(?:€|EUR)/i.test(document.body.innerText)"
 
 # Honest, identifiable User-Agent — not pretending to be a regular browser
 # Includes contact info as best practice for ethical scraping
@@ -35,11 +81,11 @@ USER_AGENT = (
 
 # ─── Data contract ────────────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TicketResult:
     game_name: str
     url: str
-    prices: list[float]
+    prices: list[float]           # ascending, de-duplicated
     min_price: Optional[float]
     max_price: Optional[float]
     currency: str = "EUR"
@@ -52,98 +98,405 @@ class TicketResult:
 
 # ─── robots.txt compliance ────────────────────────────────────────────────────
 
-@lru_cache(maxsize=16)
-def _is_allowed_by_robots(url: str) -> bool:
+# One lock per origin so concurrent scrapes of the same host wait for a single
+# robots.txt fetch instead of all missing the cache together
+_ROBOTS_LOCKS: dict[str, threading.Lock] = {}
+
+
+@lru_cache(maxsize=64)
+def _robots_for(origin: str) -> Optional[urllib.robotparser.RobotFileParser]:
     """
-    Check robots.txt for the given URL.
-    Returns True if scraping is permitted (or robots.txt is unreachable).
-    Cached per domain per session so we only fetch robots.txt once per domain.
+    Fetch and parse robots.txt for an origin (scheme://netloc).
+    Cached so each domain's robots.txt is fetched once per session.
+    Returns None if it is unreachable.
     """
-    parsed  = urllib.parse.urlparse(url)
-    robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-    rp = urllib.robotparser.RobotFileParser()
-    rp.set_url(robots_url)
+    rp  = urllib.robotparser.RobotFileParser()
+    req = urllib.request.Request(f"{origin}/robots.txt", headers={"User-Agent": USER_AGENT})
     try:
-        rp.read()
-        allowed = rp.can_fetch(USER_AGENT, url)
-        if not allowed:
-            logger.warning(f"robots.txt disallows scraping {url} — skipping")
-        return allowed
+        # Same as rp.read(), but bounded by a timeout and sent with our User-Agent
+        try:
+            with urllib.request.urlopen(req, timeout=ROBOTS_TIMEOUT_S) as resp:
+                body = resp.read().decode("utf-8", errors="replace")
+        except urllib.error.HTTPError as err:
+            if err.code in (401, 403):
+                rp.disallow_all = True
+            elif 400 <= err.code < 500:
+                rp.allow_all = True
+            return rp
+        rp.parse(body.splitlines())
+        return rp
     except Exception as e:
         # If robots.txt is unreachable, treat as permitted (standard convention)
-        logger.info(f"Could not fetch robots.txt for {parsed.netloc} ({e}) — proceeding")
+        logger.info(f"Could not fetch robots.txt for {origin} ({e}) — proceeding")
+        return None
+
+
+def _is_allowed_by_robots(url: str) -> bool:
+    """
+    Check robots.txt for the given URL.
+    Returns True if scraping is permitted (or robots.txt is unreachable).
+    """
+    parsed = urllib.parse.urlparse(url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    with _ROBOTS_LOCKS.setdefault(origin, threading.Lock()):
+        rp = _robots_for(origin)
+    if rp is None:
         return True
+    allowed = rp.can_fetch(USER_AGENT, url)
+    if not allowed:
+        logger.warning(f"robots.txt disallows scraping {url} — skipping")
+    return allowed
 
 
 # ─── Price extraction ─────────────────────────────────────────────────────────
 
+# "€ 120" / "EUR 120" / "120 €" / "120 EUR" fused into one single-pass pattern.
+# Only the currency (prefix form) or the digits (suffix form) are consumed —
+# the other half sits in a lookahead — so a number between two currency
+# tokens ("€100 €") is still seen by both forms.
+_AMOUNT   = r"[\d,]+(?:\.\d{1,2})?"
+_PRICE_RE = re.compile(
+    rf"(?:€|EUR)\s*(?=(?P<pre>{_AMOUNT}))|(?P<post>{_AMOUNT})(?=\s*(?:€|EUR))",
+    re.IGNORECASE,
+)
+
+# Every price needs a currency token, so find those cheaply first and run
+# _PRICE_RE only over the digit/space run either side of each one
+_TOKEN_RE      = re.compile(r"€|EUR", re.IGNORECASE)
+_AMOUNT_RUN_RE = re.compile(r"[\d,.\s]*")
+
+
+MIN_PRICE = 10
+MAX_PRICE = 50_000
+
+
+def _to_price(raw: str) -> Optional[float]:
+    """A matched amount as a float, or None if it isn't a plausible ticket price."""
+    raw = raw.replace(",", "")
+    if raw.isdecimal():
+        # Whole euros — the common case — range-check as an int
+        iv = int(raw)
+        return float(iv) if MIN_PRICE <= iv <= MAX_PRICE else None
+    try:
+        val = float(raw)
+    except ValueError:
+        return None
+    return val if MIN_PRICE <= val <= MAX_PRICE else None
+
+
 def _extract_prices_from_text(text: str) -> list[float]:
     """Extract all plausible EUR ticket prices from rendered page text."""
-    patterns = [
-        r"€\s*([\d,]+(?:\.\d{1,2})?)",
-        r"EUR\s*([\d,]+(?:\.\d{1,2})?)",
-        r"([\d,]+(?:\.\d{1,2})?)\s*€",
-        r"([\d,]+(?:\.\d{1,2})?)\s*EUR",
-    ]
-    found = []
-    for pattern in patterns:
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            raw = match.group(1).replace(",", "")
-            try:
-                val = float(raw)
-                if 10 <= val <= 50_000:
-                    found.append(val)
-            except ValueError:
-                pass
-    return sorted(set(found))
+    # Blocked, captcha and error pages carry no currency at all — plain
+    # substring checks rule that out far faster than the regex scan.
+    # Case-insensitive to match _TOKEN_RE: "EuR 300" is still a price.
+    if "€" not in text and "eur" not in text.lower():
+        return []
+
+    found: set[float] = set()
+    for token in _TOKEN_RE.finditer(text):
+        start, end = token.span()
+        while start and (text[start - 1].isdecimal() or text[start - 1] in ",." or text[start - 1].isspace()):
+            start -= 1
+        end = _AMOUNT_RUN_RE.match(text, end).end()
+
+        for match in _PRICE_RE.finditer(text, start, end):
+            price = _to_price(match.group("pre") or match.group("post"))
+            if price is not None:
+                found.add(price)
+    return sorted(found)
+
+
+# Nodes that carry prices on the portals we watch; anything else is page chrome
+_PRICE_NODES_CSS = '[class*="price" i], [class*="amount" i], [data-price], [itemprop="price"]'
+_MAIN_REGION_CSS = "main, [role=main], #content, .content"
+_NON_TEXT_TAGS   = ["script", "style", "noscript", "template"]
+
+
+def _extract_prices_from_node(root: LexborNode) -> list[float]:
+    found = set()
+    for node in root.css(_PRICE_NODES_CSS):
+        found.update(_extract_prices_from_text(node.text(separator=" ")))
+    if found:
+        return sorted(found)
+    return _extract_prices_from_text(root.text(separator=" "))
+
+
+def _extract_prices_from_html(html: str) -> list[float]:
+    """
+    Extract EUR ticket prices from rendered page HTML. The main content region
+    is scanned first, so "from €99" teasers in the nav and footer are ignored;
+    the whole body is only used when that region holds no prices. Within a
+    region, only price-like nodes are scanned unless none of them hold one.
+    """
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(_NON_TEXT_TAGS)
+
+    body = tree.body
+    if body is None:
+        return []
+    main = tree.css_first(_MAIN_REGION_CSS)
+    if main is not None:
+        prices = _extract_prices_from_node(main)
+        if prices:
+            return prices
+    return _extract_prices_from_node(body)
+
+
+# In-page twin of _extract_prices_from_html: same region and node priority,
+# same pattern as _PRICE_RE, but only the matched amounts cross the CDP pipe
+_PRICE_CANDIDATES_JS = r"""
+([mainCss, nodesCss, lo, hi]) => {
+    const re = /(?:€|EUR)\s*(?=([\d,]+(?:\.\d{1,2})?))|([\d,]+(?:\.\d{1,2})?)(?=\s*(?:€|EUR))/gi;
+    const inRange = s => { const v = parseFloat(s.replace(/,/g, "")); return v >= lo && v <= hi; };
+    const scan = texts => texts.flatMap(t => Array.from(t.matchAll(re), m => m[1] || m[2])).filter(inRange);
+    if (!document.body) return null;
+    for (const root of [document.querySelector(mainCss), document.body]) {
+        if (!root) continue;
+        let found = scan(Array.from(root.querySelectorAll(nodesCss), n => n.innerText));
+        if (!found.length) found = scan([root.innerText]);
+        if (found.length) return found;
+    }
+    return [];
+}
+"""
+
+
+def _prices_from_candidates(candidates: list[str]) -> list[float]:
+    """Convert amounts already matched in-page into sorted, de-duplicated prices."""
+    return sorted({price for price in map(_to_price, candidates) if price is not None})
 
 
 # ─── Playwright scraper ───────────────────────────────────────────────────────
 
-def _scrape_with_playwright(url: str) -> str:
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch(
-            headless=True,
-            args=[
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-            ],
+class PlaywrightSession:
+    """
+    One HTTP client and one lazily launched headless Chromium, shared by
+    every scrape in a run:
+
+        async with PlaywrightSession() as session:
+            await fetch_ticket_prices_async(name, url, session)
+
+    Chromium only starts the first time a page actually needs JS rendering.
+    Pages are then opened from a single BrowserContext, so URLs on the same
+    host share its socket pool and DNS cache and reuse one TLS connection.
+    With profile_dir that context is a persistent Chromium profile, which
+    only one session at a time can hold; by default it is a fresh one.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None) -> None:
+        self._pw:           Optional[Playwright]     = None
+        self._browser:      Optional[Browser]        = None
+        self._context:      Optional[BrowserContext] = None
+        self._launch_error: Optional[Exception]      = None
+        self._launch      = asyncio.Lock()
+        self._profile_dir = profile_dir
+
+    async def __aenter__(self) -> "PlaywrightSession":
+        self.http = httpx.AsyncClient(
+            http2=True,
+            headers={"User-Agent": USER_AGENT},
+            timeout=HTTP_TIMEOUT_S,
+            follow_redirects=True,
         )
-        context = browser.new_context(
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        try:
+            await self.http.aclose()
+        finally:
+            if self._pw is not None:
+                try:
+                    if self._browser is not None:
+                        await self._browser.close()
+                    elif self._context is not None:
+                        await self._context.close()
+                finally:
+                    await self._pw.stop()
+
+    @property
+    def persistent(self) -> bool:
+        """True when pages load through a persistent profile and its HTTP cache."""
+        return self._profile_dir is not None
+
+    async def context(self) -> BrowserContext:
+        """The shared BrowserContext, launching Chromium on first use."""
+        async with self._launch:
+            if self._launch_error is not None:
+                # Launching again would only fail the same way, one URL at a time
+                raise self._launch_error
+            if self._context is None:
+                try:
+                    self._context = await self._start()
+                except Exception as e:
+                    self._launch_error = e
+                    raise
+        return self._context
+
+    async def _start(self) -> BrowserContext:
+        context_options = dict(
             user_agent=USER_AGENT,
             viewport={"width": 1280, "height": 900},
             locale="en-GB",
             timezone_id="Europe/London",
         )
+        pw = await async_playwright().start()
+        try:
+            if self._profile_dir is not None:
+                context = await pw.chromium.launch_persistent_context(
+                    self._profile_dir, headless=True, args=_CHROMIUM_ARGS + _PERSISTENT_PROFILE_ARGS,
+                    **context_options,
+                )
+            else:
+                # Closing the browser in __aexit__ closes its contexts too
+                self._browser = await pw.chromium.launch(headless=True, args=_CHROMIUM_ARGS)
+                context = await self._browser.new_context(**context_options)
+        except BaseException:
+            await pw.stop()
+            raise
+        self._pw = pw
+        return context
+
+
+async def _fetch_static_prices(session: PlaywrightSession, url: str) -> list[float]:
+    """Prices present in the server-rendered HTML; [] if the page needs JS or the fetch fails."""
+    try:
+        resp = await session.http.get(url)
+    except httpx.HTTPError as e:
+        logger.info(f"Static fetch failed for {url}: {e!r}")
+        return []
+    if not resp.is_success:
+        return []
+    return _extract_prices_from_html(resp.text)
 
-        page = context.new_page()
 
-        try:
-            page.goto(url, wait_until="networkidle", timeout=PAGE_LOAD_TIMEOUT_MS)
-        except PWTimeout:
-            logger.warning(f"networkidle timeout for {url}, falling back to domcontentloaded")
-            page.goto(url, wait_until="domcontentloaded", timeout=PAGE_LOAD_TIMEOUT_MS)
+async def _abort_assets(route: Route) -> None:
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _wait_for_prices(page: Page) -> None:
+    try:
+        await page.wait_for_function(PRICE_RENDERED_JS, timeout=JS_SETTLE_WAIT_MS)
+    except PWTimeout:
+        pass  # no prices rendered in time — let extraction report what's there
+
 
-        page.wait_for_timeout(JS_SETTLE_WAIT_MS)
-        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-        page.wait_for_timeout(1_000)
+async def _scrape_page(session: PlaywrightSession, url: str, block_assets: bool = True) -> list[float]:
+    page = await (await session.context()).new_page()
+    try:
+        if block_assets and not session.persistent:
+            await page.route("**/*", _abort_assets)
+        await page.goto(url, wait_until="domcontentloaded", timeout=PAGE_LOAD_TIMEOUT_MS)
+        await _wait_for_prices(page)
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        await _wait_for_prices(page)
 
-        text = page.inner_text("body")
-        browser.close()
-        return text
+        try:
+            candidates = await page.evaluate(
+                _PRICE_CANDIDATES_JS, [_MAIN_REGION_CSS, _PRICE_NODES_CSS, MIN_PRICE, MAX_PRICE],
+            )
+        except PWError as e:
+            logger.info(f"In-page price extraction failed for {url} ({e}) — parsing page HTML")
+            candidates = None
+        if candidates is not None:
+            return _prices_from_candidates(candidates)
+        return _extract_prices_from_html(await page.content())
+    finally:
+        await page.close()
+
+
+async def _fetch_prices(session: PlaywrightSession, url: str) -> list[float]:
+    prices = await _fetch_static_prices(session, url)
+    if prices:
+        logger.info(f"Prices found in static HTML for {url} — skipping browser")
+        return prices
+    return await _scrape_page(session, url)
 
 
 # ─── Public API ───────────────────────────────────────────────────────────────
 
 def fetch_ticket_prices(game_name: str, url: str) -> TicketResult:
+    """Blocking wrapper around fetch_ticket_prices_async for callers without an event loop."""
+    return asyncio.run(fetch_ticket_prices_async(game_name, url))
+
+
+def fetch_ticket_prices_batch(jobs: list[tuple[str, str]]) -> list[TicketResult]:
+    """Blocking wrapper around fetch_ticket_prices_batch_async for callers without an event loop."""
+    return asyncio.run(fetch_ticket_prices_batch_async(jobs))
+
+
+async def fetch_ticket_prices_batch_async(
+    jobs: list[tuple[str, str]],
+    max_concurrency: Optional[int] = 5,
+    per_host_limit: Optional[int] = None,
+    budget_s: Optional[float] = None,
+    profile_dir: Optional[str] = None,
+) -> list[TicketResult]:
+    """
+    Scrape every (game_name, url) job concurrently through one PlaywrightSession.
+    At most max_concurrency pages load at once overall, and per_host_limit per
+    host (None lifts either cap). Jobs still running after budget_s seconds are
+    cancelled and reported as timeouts. profile_dir is passed to the session.
+    Returns one TicketResult per job, in job order; never raises.
+    """
+    if not jobs:
+        return []
+    sem = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    host_limits = {
+        urllib.parse.urlparse(url).netloc: asyncio.Semaphore(per_host_limit)
+        for _, url in jobs
+    } if per_host_limit else {}
+
+    async def scrape_one(session: PlaywrightSession, name: str, url: str) -> TicketResult:
+        async with sem or nullcontext(), host_limits.get(urllib.parse.urlparse(url).netloc) or nullcontext():
+            return await fetch_ticket_prices_async(name, url, session)
+
+    results: Optional[list] = None
+    try:
+        async with PlaywrightSession(profile_dir=profile_dir) as session:
+            tasks = [asyncio.create_task(scrape_one(session, name, url)) for name, url in jobs]
+            done, pending = await asyncio.wait(tasks, timeout=budget_s)
+            if pending:
+                logger.warning(f"Scrape budget of {budget_s}s exhausted — {len(pending)} URL(s) still loading")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            results = [
+                (task.exception() or task.result()) if task in done else TimeoutError("scrape timeout")
+                for task in tasks
+            ]
+    except Exception as e:
+        if results is None:
+            logger.exception("Scrape session failed before any results were collected")
+            results = [e] * len(jobs)
+        else:
+            # Teardown failed after every job settled — keep what was scraped
+            logger.exception("Error closing the scrape session")
+
+    return [
+        result if isinstance(result, TicketResult) else
+        TicketResult(game_name=name, url=url, prices=[], min_price=None, max_price=None, error=str(result))
+        for (name, url), result in zip(jobs, results)
+    ]
+
+
+async def fetch_ticket_prices_async(
+    game_name: str, url: str, session: PlaywrightSession | None = None,
+) -> TicketResult:
     """
     Check robots.txt compliance then fetch and extract EUR ticket prices.
+    Server-rendered prices are read with a plain HTTP GET; Chromium is only
+    used when that finds none. Pass an open PlaywrightSession to share one
+    client and browser across calls; without one, a session is opened just
+    for this URL.
     Returns a TicketResult; never raises.
     """
     logger.info(f"[{game_name}] Checking robots.txt → {url}")
 
-    # Compliance check first
-    if not _is_allowed_by_robots(url):
+    # Compliance check first (urllib is blocking — keep it off the event loop)
+    if not await asyncio.to_thread(_is_allowed_by_robots, url):
         msg = "Blocked by robots.txt — skipping to stay compliant"
         logger.warning(f"[{game_name}] {msg}")
         return TicketResult(
@@ -152,13 +505,16 @@ def fetch_ticket_prices(game_name: str, url: str) -> TicketResult:
             error=msg,
         )
 
-    logger.info(f"[{game_name}] robots.txt OK — launching browser")
+    logger.info(f"[{game_name}] robots.txt OK — loading page")
     try:
-        page_text = _scrape_with_playwright(url)
-        prices    = _extract_prices_from_text(page_text)
+        if session is None:
+            async with PlaywrightSession() as own_session:
+                prices = await _fetch_prices(own_session, url)
+        else:
+            prices = await _fetch_prices(session, url)
 
         if not prices:
-            logger.info(f"[{game_name}] No prices found in rendered text.")
+            logger.info(f"[{game_name}] No prices found in rendered page.")
         else:
             logger.info(f"[{game_name}] Prices found: {prices}")
 
@@ -166,8 +522,8 @@ def fetch_ticket_prices(game_name: str, url: str) -> TicketResult:
             game_name=game_name,
             url=url,
             prices=prices,
-            min_price=min(prices) if prices else None,
-            max_price=max(prices) if prices else None,
+            min_price=prices[0] if prices else None,
+            max_price=prices[-1] if prices else None,
         )
 
     except PWTimeout as e:
@@ -0,0 +1,116 @@
+"""
+Regression tests for scraper._extract_prices_from_text and
+scraper._extract_prices_from_html.
+
+The extractor has been rewritten for speed several times (fused regex,
+currency-token prefilter, set/int fast path, no-currency early return).
+Each rewrite must return exactly what the original four-pattern version
+did, so this compares the two over hand-picked cases plus a seeded
+random corpus that mixes currency tokens in every letter case. The HTML
+cases pin which region and which nodes win when a page quotes several prices.
+
+    python -m unittest discover -s tests
+"""
+
+import random
+import re
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scraper import _extract_prices_from_html, _extract_prices_from_text
+
+_REFERENCE_PATTERNS = [
+    r"€\s*([\d,]+(?:\.\d{1,2})?)",
+    r"EUR\s*([\d,]+(?:\.\d{1,2})?)",
+    r"([\d,]+(?:\.\d{1,2})?)\s*€",
+    r"([\d,]+(?:\.\d{1,2})?)\s*EUR",
+]
+
+SAMPLES = [
+    "Tickets from €150 and €700", "EUR 120", "550 €", "EUR 300, 250 EUR", "nothing",
+    "100 € 200", "€1,250.50 per seat", "Price: 3,499.99EUR / eur 45 / 12 € / €5 / € 99999",
+    "€ , EUR ,,, 1,2,3 €", "Europe 2025 tickets eur450", "100€200€300 EUR400",
+    "€\n 250\n\n", "1.5 € 10.999 €", "Hospitality from EUR1,200 — Gold EUR 2,400.00",
+    "€€ 300", "€12345678 EUR 40", "price 120 EuR", "eUR 300", "Eur 75 and 80 eUr",
+]
+
+# Single letters in both cases so the corpus produces "eUR", "EuR", ... too
+_TOKENS = ["€", "EUR", "eur", "E", "e", "U", "u", "R", "r", " ", ",", ".", "1", "5", "0", "9", "x", "\n"]
+CORPUS_SIZE = 20_000
+
+
+def _reference_extract(text: str) -> list[float]:
+    """The original extractor: four IGNORECASE patterns, list, then sorted(set(...))."""
+    found = []
+    for pattern in _REFERENCE_PATTERNS:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            raw = match.group(1).replace(",", "")
+            try:
+                val = float(raw)
+                if 10 <= val <= 50_000:
+                    found.append(val)
+            except ValueError:
+                pass
+    return sorted(set(found))
+
+
+class ExtractPricesMatchesReference(unittest.TestCase):
+
+    def test_hand_picked_samples(self):
+        for text in SAMPLES:
+            with self.subTest(text=text):
+                self.assertEqual(_extract_prices_from_text(text), _reference_extract(text))
+
+    def test_random_corpus(self):
+        rng = random.Random(1)
+        mismatches = []
+        for _ in range(CORPUS_SIZE):
+            text = "".join(rng.choice(_TOKENS) for _ in range(rng.randint(1, 40)))
+            got, want = _extract_prices_from_text(text), _reference_extract(text)
+            if got != want:
+                mismatches.append((text, want, got))
+        self.assertEqual(mismatches[:5], [], f"{len(mismatches)} of {CORPUS_SIZE} texts differ")
+
+
+class ExtractPricesFromHtml(unittest.TestCase):
+
+    def test_main_region_beats_nav_and_footer(self):
+        html = "<body><nav>from €99</nav><main><p>Gold €450</p></main><footer>€15</footer></body>"
+        self.assertEqual(_extract_prices_from_html(html), [450.0])
+
+    def test_body_used_when_main_has_no_prices(self):
+        html = "<body><nav>from €99</nav><main><p>Sold out</p></main></body>"
+        self.assertEqual(_extract_prices_from_html(html), [99.0])
+
+    def test_price_nodes_beat_surrounding_text(self):
+        html = '<main><div class="Price">€250</div><p>€300</p></main>'
+        self.assertEqual(_extract_prices_from_html(html), [250.0])
+
+    def test_full_text_used_when_price_nodes_hold_no_price(self):
+        html = '<main><span class="price-filter">Any</span><p>€320</p></main>'
+        self.assertEqual(_extract_prices_from_html(html), [320.0])
+
+    def test_price_class_match_ignores_case(self):
+        html = '<main><span class="Product-PRICE">€410</span><p>€500</p></main>'
+        self.assertEqual(_extract_prices_from_html(html), [410.0])
+
+    def test_price_split_across_child_elements(self):
+        html = '<main><div data-price="1"><b>EUR</b> <i>1,250</i></div></main>'
+        self.assertEqual(_extract_prices_from_html(html), [1250.0])
+
+    def test_script_style_and_noscript_are_ignored(self):
+        html = (
+            '<main><script>var p = "€999"</script><style>.x:after { content: "€888" }</style>'
+            "<noscript>€777</noscript><p>€200</p></main>"
+        )
+        self.assertEqual(_extract_prices_from_html(html), [200.0])
+
+    def test_empty_document(self):
+        self.assertEqual(_extract_prices_from_html(""), [])
+
+
+if __name__ == "__main__":
+    unittest.main()